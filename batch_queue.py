@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import textwrap
+from typing import Dict, List, Optional
+
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger("depre_buddy.batch_queue")
+
+RESOURCE_LOOKUP_PROMPT = (
+    "In at most five short lines, list current, reputable mental health resources "
+    "for someone whose PHQ-9 screening result is '{category}': therapy options, "
+    "support groups, self-help strategies and crisis hotlines. Names and one "
+    "practical next step only, no introduction."
+)
+
+_FINISHED_STATES = {
+    types.JobState.JOB_STATE_SUCCEEDED,
+    types.JobState.JOB_STATE_PARTIALLY_SUCCEEDED,
+    types.JobState.JOB_STATE_FAILED,
+    types.JobState.JOB_STATE_CANCELLED,
+    types.JobState.JOB_STATE_EXPIRED,
+}
+
+
+class BatchQueue:
+    """
+    Collects non-interactive resource lookups keyed by assessment category and
+    resolves them through the Gemini Batch API instead of per-request generateContent.
+
+    A background task flushes the queue once it holds max_batch_size categories or
+    flush_interval seconds have passed, then polls the batch job until it finishes.
+    Each result is shortened to max_summary_chars and kept in the shared store
+    (the reply cache, so Redis when configured) for every later session and worker
+    in that category. Before submitting, a worker claims the category in the store,
+    so only one worker runs a lookup at a time.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        store,
+        max_batch_size: int = 20,
+        flush_interval: float = 60.0,
+        poll_interval: float = 30.0,
+        claim_ttl: int = 86400,  # Upper bound on a batch job; a dead worker's claim lapses
+        max_summary_chars: int = 600,
+    ):
+        self._client: Optional[genai.Client] = None
+        self._model = model
+        self._store = store
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.claim_ttl = claim_ttl
+        self.max_summary_chars = max_summary_chars
+        self._pending: Dict[str, None] = {}  # insertion-ordered set of categories
+        self._in_flight: set = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(category: str) -> str:
+        return f"resources:{category}"
+
+    async def get(self, category: str) -> Optional[str]:
+        """Return the batched resource summary for a category, if it has been resolved."""
+        return await self._store.get(self._key(category))
+
+    def enqueue(self, category: str) -> None:
+        """Queue a resource lookup for a category unless this worker already has it queued."""
+        if category in self._pending or category in self._in_flight:
+            return
+        self._pending[category] = None
+        if len(self._pending) >= self.max_batch_size:
+            self._wakeup.set()
+
+    def start(self, client: genai.Client) -> None:
+        """Start the background flush loop, submitting batches through the given client."""
+        self._client = client
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending:
+                try:
+                    await self._flush()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Resource batch flush failed")
+
+    async def _flush(self) -> None:
+        candidates: List[str] = list(self._pending)[: self.max_batch_size]
+        for category in candidates:
+            del self._pending[category]
+
+        # Skip categories already resolved or being looked up by another worker
+        categories: List[str] = []
+        for category in candidates:
+            if await self._store.get(self._key(category)) is None and await self._store.claim(
+                f"{self._key(category)}:claim", self.claim_ttl
+            ):
+                categories.append(category)
+        if not categories:
+            return
+        self._in_flight.update(categories)
+
+        try:
+            requests = [
+                types.InlinedRequest(
+                    contents=RESOURCE_LOOKUP_PROMPT.format(category=category),
+                    config=types.GenerateContentConfig(
+                        tools=[types.Tool(google_search=types.GoogleSearch())]
+                    ),
+                )
+                for category in categories
+            ]
+            job = await self._client.aio.batches.create(
+                model=self._model,
+                src=requests,
+                config=types.CreateBatchJobConfig(display_name="depre-buddy-resources"),
+            )
+            logger.info("Submitted resource batch %s for %d categories", job.name, len(categories))
+            while job.state not in _FINISHED_STATES:
+                await asyncio.sleep(self.poll_interval)
+                job = await self._client.aio.batches.get(name=job.name)
+
+            responses = job.dest.inlined_responses if job.dest else None
+            # Inlined responses come back in the same order as the submitted requests
+            for category, inlined in zip(categories, responses or []):
+                if inlined.response is not None and inlined.response.text:
+                    summary = textwrap.shorten(inlined.response.text, self.max_summary_chars, placeholder=" ...")
+                    await self._store.set(self._key(category), summary)
+        finally:
+            self._in_flight.difference_update(categories)
+            # Release the claims so a failed lookup can be retried by any worker
+            for category in categories:
+                await self._store.delete(f"{self._key(category)}:claim")
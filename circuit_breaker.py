@@ -0,0 +1,28 @@
+import time
+
+
+class CircuitBreaker:
+    """
+    Process-wide breaker in front of Gemini.
+    A 429 that survives the SDK's own retries opens the breaker for `cooldown`
+    seconds; while it is open new agent turns fail fast instead of piling more
+    requests onto a throttled API. Consecutive throttles double the cooldown up
+    to max_cooldown, and the first successful call resets it.
+    """
+
+    def __init__(self, cooldown: float = 5.0, max_cooldown: float = 60.0):
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._cooldown = cooldown
+        self._open_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self._open_until
+
+    def record_throttle(self) -> None:
+        self._open_until = time.monotonic() + self._cooldown
+        self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+
+    def record_success(self) -> None:
+        self._cooldown = self.base_cooldown
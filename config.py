@@ -1,19 +1,71 @@
+import logging
+import queue
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
-import os
 
+# Populate os.environ once per process; the Gemini client reads GOOGLE_API_KEY from it
 load_dotenv()
 
 class Settings(BaseSettings):
-    GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY")
-    MODEL_NAME: str = os.getenv("MODEL_NAME") or "gemini-2.5-flash"  # Fast, cost-effective Gemini model
-    SECRET_KEY: str = os.getenv("SECRET_KEY") or "your-secret-key"
+    GOOGLE_API_KEY: str = ""
+    MODEL_NAME: str = "gemini-2.5-flash"  # Fast, cost-effective Gemini model
+    SECRET_KEY: str = "your-secret-key"
+    LOG_LEVEL: str = "INFO"
+    # Gemini service tiers ("PRIORITY", "FLEX"), sent as an untyped request-body field;
+    # empty keeps the Standard tier. Opt-in only: set one after checking your endpoint accepts it
+    INTERACTIVE_SERVICE_TIER: str = ""  # Triage and assessment turns
+    RESOURCE_SERVICE_TIER: str = ""  # Resource agent turns
+    # Session storage: Redis when set (e.g. redis://localhost:6379/0), otherwise in-process
+    REDIS_URL: str = ""
+    SESSION_TTL_SECONDS: int = 1800  # Idle sessions expire after 30 minutes
+    SESSION_CLEANUP_INTERVAL_SECONDS: int = 900  # How often the in-process store drops idle sessions
+    SESSION_MAX_ENTRIES: int = 10_000  # LRU cap for the in-process store
+    SESSION_HISTORY_LIMIT: int = 20  # History entries kept per session (10 user + 10 agent)
+    # Resource agent reply cache (Redis when REDIS_URL is set)
+    RESPONSE_CACHE_TTL_SECONDS: int = 86400
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000  # LRU cap for the in-process cache
+    GEMINI_MAX_CONCURRENCY: int = 8  # Agent turns in flight to Gemini per worker
+    BATCH_MAX_ITEMS: int = 100  # Chat turns accepted by one /batch request
+    # Gemini context caching of the static agent instructions
+    CONTEXT_CACHE_TTL_SECONDS: int = 3600
+    CONTEXT_CACHE_INTERVALS: int = 10  # Turns served from one cache before it is refreshed
+    CONTEXT_CACHE_MIN_TOKENS: int = 1024  # Gemini rejects explicit caches smaller than this
+    # Uvicorn worker processes for `python main.py`; 0 = one per CPU core with REDIS_URL, else 1
+    WEB_CONCURRENCY: int = 0
 
-    if not GOOGLE_API_KEY:
-        raise ValueError("GOOGLE_API_KEY environment variable is not set.")
-    
     class Config:
         extra = 'allow'  # Accept extra fields without error
         env_file = ".env"  # Optional: specify env file if used
+        frozen = True  # Shared process-wide, so never mutated after load
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load and validate the settings exactly once per process."""
+    settings = Settings()
+    if not settings.GOOGLE_API_KEY:
+        raise ValueError("GOOGLE_API_KEY environment variable is not set.")
+    return settings
+
+
+settings = get_settings()
+
+
+logger = logging.getLogger("depre_buddy")
 
-settings = Settings()
\ No newline at end of file
+def configure_logging(level: str = "INFO") -> QueueListener:
+    """
+    Route all depre_buddy.* records through an in-memory queue.
+    Request handlers only enqueue records; the returned listener writes them
+    to stdout from its own thread, so logging never blocks the event loop.
+    Call listener.start() / listener.stop() around the app's lifetime.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.handlers = [QueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+    return QueueListener(log_queue, stream_handler)
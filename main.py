@@ -1,143 +1,304 @@
+import asyncio
 import os
-import uuid
+import secrets
+import textwrap
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+import orjson
+from pydantic import BaseModel, Field
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 
 # ADK imports
 from google.adk.agents import Agent
+from google.adk.agents.context_cache_config import ContextCacheConfig
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.apps import App
+from google.adk.events import Event
 from google.adk.models.google_llm import Gemini
 from google.adk.runners import InMemoryRunner
 from google.adk.tools import google_search
-from google.genai import types
+from google.genai import errors, types
 
 # Local tool imports
 from tools.crisis_detection import CrisisDetectionTool
 from tools.phq9_assessment import PHQ9AssessmentTool
+from batch_queue import BatchQueue
+from circuit_breaker import CircuitBreaker
+from session_store import InMemorySessionStore, create_session_store
+from response_cache import create_response_cache, make_cache_key
 
 # Config imports
-from config import Settings
+from config import configure_logging, logger, settings
 
-
-# --- Project Setup ---
-settings = Settings()
+# --- Logging ---
+log_listener = configure_logging(settings.LOG_LEVEL)
 
 # --- ADK Retry Configuration ---
+# Waits double from 0.5s (0.5, 1, 2, 4) and are capped, and each gets random jitter
+# so concurrent sessions throttled by the same 429 burst do not retry in lockstep.
+# Only throttling and transient server errors are retried; client errors fail fast.
 retry_config = types.HttpRetryOptions(
     attempts=5,
-    exp_base=7, 
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504]
+    exp_base=2,
+    initial_delay=0.5,
+    max_delay=30,
+    jitter=3,
+    http_status_codes=[429, 500, 502, 503, 504]
 )
 
+def service_tier_config(tier: str) -> Optional[types.GenerateContentConfig]:
+    """Request a Gemini service tier; the SDK has no field for it, so it goes in the raw request body"""
+    if not tier:
+        return None
+    return types.GenerateContentConfig(
+        http_options=types.HttpOptions(extra_body={"generationConfig": {"serviceTier": tier}})
+    )
+
 # --- ADK Session Store ---
-session_store: Dict[str, Dict[str, Any]] = {}
+# Redis when REDIS_URL is set (shared across workers, TTL-evicted), otherwise in-process
+session_store = create_session_store(settings)
+
+# --- Resource Reply Cache ---
+# Opening resource agent replies keyed by (assessment category, PHQ-9 score, crisis flag,
+# normalized message); follow-up turns depend on their own conversation and are never cached
+response_cache = create_response_cache(settings)
 
 # --- ADK Tools Initialization ---
 crisis_tool = CrisisDetectionTool()
 phq9_tool = PHQ9AssessmentTool()
 
+# --- Context Caching ---
+# The static instructions and tool declarations are stored once as Gemini cached
+# content and referenced on later turns; ADK creates and refreshes the caches.
+context_cache_config = ContextCacheConfig(
+    cache_intervals=settings.CONTEXT_CACHE_INTERVALS,
+    ttl_seconds=settings.CONTEXT_CACHE_TTL_SECONDS,
+    min_tokens=settings.CONTEXT_CACHE_MIN_TOKENS,
+)
+
+# --- Agent Instructions ---
+# Built once at import and sent with every agent turn, so indentation and trailing
+# whitespace are stripped here rather than paid for in prompt tokens
+TRIAGE_INSTRUCTION = textwrap.dedent("""\
+    You are a compassionate mental health triage specialist.
+
+    YOUR RESPONSIBILITIES:
+    1. Greet users warmly and assess their immediate mental state
+    2. Use the crisis_detection tool if you suspect any crisis situation
+    3. Start the PHQ-9 assessment for non-crisis situations
+    4. Be empathetic, non-judgmental, and focused on user safety
+
+    CRISIS DETECTION:
+    - If the user mentions self-harm, suicide, or immediate danger, use crisis_detection immediately
+    - For crisis situations, provide emergency resources and support
+
+    PHQ-9 ASSESSMENT:
+    - For non-crisis situations, begin the PHQ-9 assessment using administer_question
+    - Start with question 1 and guide the user through the process
+
+    Always prioritize user safety and provide a supportive, understanding environment.
+""").strip()
+
+ASSESSMENT_INSTRUCTION = textwrap.dedent("""\
+    You are a clinical mental health assessment specialist.
+
+    YOUR RESPONSIBILITIES:
+    1. Administer the PHQ-9 depression assessment professionally
+    2. Guide users through all 8 questions with empathy and clarity
+    3. Use the administer_question tool to process responses and track progress
+    4. Calculate scores and provide appropriate clinical context
+    5. Emphasize that this is a screening tool, not a diagnosis
+
+    ASSESSMENT PROCESS:
+    - Ask one question at a time using the administer_question tool
+    - After the user answers, acknowledge their response before moving to the next question.
+    - Clearly state the current question number and text.
+    - Include the meaning of the scale in each question. For example: "On a scale of 0 to 3, where 0 is 'Not at all', 1 is 'Several days', 2 is 'More than half the days', and 3 is 'Nearly every day', how often have you been bothered by..."
+    - Be supportive and understanding throughout the process
+    - When complete, provide the score and appropriate next steps
+
+    USER GUIDANCE:
+    - If the user provides a non-numerical answer, gently guide them to provide a score between 0 and 3. For example, you can say: "I understand you're feeling down. To help me understand better, could you please rate how much you've been bothered by this on a scale of 0 to 3, where 0 is 'Not at all' and 3 is 'Nearly every day'?"
+    - If the user's answer is vague or you are uncertain about the score, ask for confirmation. For example, if they say "sometimes," you could ask: "It sounds like you're saying you've been bothered by this on 'several days', which would be a 1 on our scale. Does that sound right?"
+    - If the user's answer is a phrase like "Almost every day", rephrase it as a question to confirm. For example: "So for question 2, you're saying you've been bothered by [question text] 'Nearly every day'. Is that correct?"
+    - Continue the assessment until all 8 questions have been answered with a valid numerical score.
+""").strip()
+
+RESOURCE_INSTRUCTION = textwrap.dedent("""\
+    You are a mental health resource specialist.
+
+    YOUR RESPONSIBILITIES:
+    1. Provide appropriate mental health resources based on the user's situation
+    2. Use Google Search to find current, relevant information and local resources
+    3. Include crisis resources when needed
+    4. Offer practical next steps and emphasize that help is available
+    5. Provide hope and encouragement
+
+    RESOURCE GUIDELINES:
+    - For crisis situations: Provide immediate hotlines and emergency contacts
+    - For assessment results: Tailor resources to the severity level
+    - Always include: Therapy options, support groups, self-help strategies
+    - Provide specific, actionable steps the user can take
+    - Emphasize that professional help is available and effective
+""").strip()
+
 # --- ADK Agents Definition ---
+def build_runners(model: Gemini) -> Dict[str, InMemoryRunner]:
+    """Build the three agents around one shared model and wrap each in a runner"""
+
+    # Triage Agent - Handles initial crisis detection and routing
+    triage_agent = Agent(
+        name="triage_agent",
+        model=model,
+        description="Mental health triage agent that detects crises and starts assessment",
+        instruction=TRIAGE_INSTRUCTION,
+        tools=[crisis_tool.detect_crisis, phq9_tool.administer_question],
+        generate_content_config=service_tier_config(settings.INTERACTIVE_SERVICE_TIER),
+    )
 
-# Triage Agent - Handles initial crisis detection and routing
-triage_agent = Agent(
-    name="triage_agent",
-    model=Gemini(
-        model=settings.MODEL_NAME,
-        retry_options=retry_config
-    ),
-    description="Mental health triage agent that detects crises and starts assessment",
-    instruction="""You are a compassionate mental health triage specialist. 
-    
-YOUR RESPONSIBILITIES:
-1. Greet users warmly and assess their immediate mental state
-2. Use the crisis_detection tool if you suspect any crisis situation
-3. Start the PHQ-9 assessment for non-crisis situations
-4. Be empathetic, non-judgmental, and focused on user safety
-
-CRISIS DETECTION:
-- If the user mentions self-harm, suicide, or immediate danger, use crisis_detection immediately
-- For crisis situations, provide emergency resources and support
-
-PHQ-9 ASSESSMENT:
-- For non-crisis situations, begin the PHQ-9 assessment using administer_question
-- Start with question 1 and guide the user through the process
-
-Always prioritize user safety and provide a supportive, understanding environment.""",
-    tools=[crisis_tool.detect_crisis, phq9_tool.administer_question],
-)
+    # Assessment Agent - Handles PHQ-9 assessment and scoring
+    assessment_agent = Agent(
+        name="assessment_agent",
+        model=model,
+        description="Clinical assessment agent that administers PHQ-9 and provides scoring",
+        instruction=ASSESSMENT_INSTRUCTION,
+        tools=[phq9_tool.administer_question, crisis_tool.detect_crisis],
+        generate_content_config=service_tier_config(settings.INTERACTIVE_SERVICE_TIER),
+    )
 
-# Assessment Agent - Handles PHQ-9 assessment and scoring
-assessment_agent = Agent(
-    name="assessment_agent",
-    model=Gemini(
-        model=settings.MODEL_NAME,
-        retry_options=retry_config
-    ),
-    description="Clinical assessment agent that administers PHQ-9 and provides scoring",
-    instruction="""You are a clinical mental health assessment specialist. 
-
-YOUR RESPONSIBILITIES:
-1. Administer the PHQ-9 depression assessment professionally
-2. Guide users through all 8 questions with empathy and clarity
-3. Use the administer_question tool to process responses and track progress
-4. Calculate scores and provide appropriate clinical context
-5. Emphasize that this is a screening tool, not a diagnosis
-
-ASSESSMENT PROCESS:
-- Ask one question at a time using the administer_question tool
-- After the user answers, acknowledge their response before moving to the next question.
-- Clearly state the current question number and text.
-- Include the meaning of the scale in each question. For example: "On a scale of 0 to 3, where 0 is 'Not at all', 1 is 'Several days', 2 is 'More than half the days', and 3 is 'Nearly every day', how often have you been bothered by..."
-- Be supportive and understanding throughout the process
-- When complete, provide the score and appropriate next steps
-
-USER GUIDANCE:
-- If the user provides a non-numerical answer, gently guide them to provide a score between 0 and 3. For example, you can say: "I understand you're feeling down. To help me understand better, could you please rate how much you've been bothered by this on a scale of 0 to 3, where 0 is 'Not at all' and 3 is 'Nearly every day'?"
-- If the user's answer is vague or you are uncertain about the score, ask for confirmation. For example, if they say "sometimes," you could ask: "It sounds like you're saying you've been bothered by this on 'several days', which would be a 1 on our scale. Does that sound right?"
-- If the user's answer is a phrase like "Almost every day", rephrase it as a question to confirm. For example: "So for question 2, you're saying you've been bothered by [question text] 'Nearly every day'. Is that correct?"
-- Continue the assessment until all 8 questions have been answered with a valid numerical score.
-""",
-    tools=[phq9_tool.administer_question, crisis_tool.detect_crisis],
-)
+    # Resource Agent - Provides tailored mental health resources
+    resource_agent = Agent(
+        name="resource_agent",
+        model=model,
+        description="Mental health resource specialist providing grounded, actionable resources",
+        instruction=RESOURCE_INSTRUCTION,
+        tools=[google_search, crisis_tool.detect_crisis],
+        generate_content_config=service_tier_config(settings.RESOURCE_SERVICE_TIER),
+    )
 
-# Resource Agent - Provides tailored mental health resources
-resource_agent = Agent(
-    name="resource_agent",
-    model=Gemini(
+    # Agent Runners - each App adds context caching to its agent
+    triage_runner = InMemoryRunner(
+        app=App(name="triage_app", root_agent=triage_agent, context_cache_config=context_cache_config)
+    )
+    assessment_runner = InMemoryRunner(
+        app=App(name="assessment_app", root_agent=assessment_agent, context_cache_config=context_cache_config)
+    )
+    resource_runner = InMemoryRunner(
+        app=App(name="resource_app", root_agent=resource_agent, context_cache_config=context_cache_config)
+    )
+
+    return {
+        "triage_agent": triage_runner,
+        "assessment_agent": assessment_runner,
+        "resource_agent": resource_runner,
+    }
+
+# Runner dispatch keyed by the agent name that route_to_agent returns.
+# Filled in by lifespan, so agents are built once per process after the event loop exists.
+RUNNERS: Dict[str, InMemoryRunner] = {}
+
+# Caps concurrent Gemini-bound agent turns across all sessions so bursts queue
+# here instead of tripping the API's 429 rate limits
+gemini_semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+
+# Opens while Gemini keeps answering 429 after retries, so new turns fail fast
+gemini_breaker = CircuitBreaker()
+
+# ADK keys its conversations by (user_id, session_id); each depre-buddy session
+# is its own ADK session under one fixed user, so sessions never share history
+ADK_USER_ID = "depre_buddy"
+
+async def run_agent(agent_name: str, session_id: str, message: str) -> Any:
+    """Run one agent turn while holding a Gemini concurrency slot"""
+    if gemini_breaker.is_open:
+        raise HTTPException(status_code=503, detail="upstream_throttled")
+    async with gemini_semaphore:
+        try:
+            # quiet: run_debug otherwise print()s every message and event to stdout
+            response = await RUNNERS[agent_name].run_debug(
+                message, user_id=ADK_USER_ID, session_id=session_id, quiet=True
+            )
+        except errors.APIError as e:
+            if e.code != 429:
+                raise
+            gemini_breaker.record_throttle()
+            raise HTTPException(status_code=503, detail="upstream_throttled") from e
+    gemini_breaker.record_success()
+    return response
+
+sse_run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+
+async def stream_agent(agent_name: str, session_id: str, message: str) -> AsyncIterator[Event]:
+    """Yield one agent turn's events as Gemini streams them, holding a concurrency slot"""
+    runner = RUNNERS[agent_name]
+    async with gemini_semaphore:
+        session_kwargs = {"app_name": runner.app_name, "user_id": ADK_USER_ID, "session_id": session_id}
+        if await runner.session_service.get_session(**session_kwargs) is None:
+            await runner.session_service.create_session(**session_kwargs)
+        try:
+            async for event in runner.run_async(
+                user_id=ADK_USER_ID,
+                session_id=session_id,
+                new_message=types.Content(role="user", parts=[types.Part(text=message)]),
+                run_config=sse_run_config,
+            ):
+                yield event
+        except errors.APIError as e:
+            if e.code != 429:
+                raise
+            gemini_breaker.record_throttle()
+            raise HTTPException(status_code=503, detail="upstream_throttled") from e
+    gemini_breaker.record_success()
+
+# --- Batched Resource Lookups ---
+# Non-interactive resource lookups go through the Gemini Batch API (reusing the
+# shared model's client); /chat itself stays on synchronous generateContent.
+# Short per-category summaries are shared through the reply cache's store.
+resource_batch_queue = BatchQueue(model=settings.MODEL_NAME, store=response_cache)
+
+async def evict_idle_sessions() -> None:
+    """Periodically drop sessions idle for longer than SESSION_TTL_SECONDS"""
+    while True:
+        await asyncio.sleep(settings.SESSION_CLEANUP_INTERVAL_SECONDS)
+        try:
+            evicted = await session_store.evict_idle(settings.SESSION_TTL_SECONDS)
+        except Exception:
+            logger.exception("Idle session cleanup failed")
+            continue
+        if evicted:
+            logger.info("Evicted %d idle sessions", evicted)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener.start()
+    await session_store.connect()
+    cleanup_task = asyncio.create_task(evict_idle_sessions())
+    # One model object (and so one google-genai client and connection pool) for all agents
+    shared_model = Gemini(
         model=settings.MODEL_NAME,
         retry_options=retry_config
-    ),
-    description="Mental health resource specialist providing grounded, actionable resources",
-    instruction="""You are a mental health resource specialist. 
-
-YOUR RESPONSIBILITIES:
-1. Provide appropriate mental health resources based on the user's situation
-2. Use Google Search to find current, relevant information and local resources
-3. Include crisis resources when needed
-4. Offer practical next steps and emphasize that help is available
-5. Provide hope and encouragement
-
-RESOURCE GUIDELINES:
-- For crisis situations: Provide immediate hotlines and emergency contacts
-- For assessment results: Tailor resources to the severity level
-- Always include: Therapy options, support groups, self-help strategies
-- Provide specific, actionable steps the user can take
-- Emphasize that professional help is available and effective""",
-    tools=[google_search, crisis_tool.detect_crisis],
-)
-
-# --- Agent Runners ---
-triage_runner = InMemoryRunner(agent=triage_agent)
-assessment_runner = InMemoryRunner(agent=assessment_agent)
-resource_runner = InMemoryRunner(agent=resource_agent)
+    )
+    RUNNERS.update(build_runners(shared_model))
+    app.state.runners = RUNNERS
+    resource_batch_queue.start(shared_model.api_client)
+    yield
+    cleanup_task.cancel()
+    await resource_batch_queue.stop()
+    RUNNERS.clear()
+    await session_store.close()
+    await response_cache.close()
+    log_listener.stop()
 
 # --- FastAPI App ---
 app = FastAPI(
     title="Depre Buddy Sequential Triage Agent", version="2.0",
-    description="A sequential triage agent for mental health assessment and resource provision"
+    description="A sequential triage agent for mental health assessment and resource provision",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # Encode JSON bodies with orjson
     )
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -147,6 +308,9 @@ class ChatRequest(BaseModel):
     session_id: str
     user_message: str
 
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest] = Field(max_length=settings.BATCH_MAX_ITEMS)
+
 class SessionResponse(BaseModel):
     session_id: str
     message: str
@@ -155,85 +319,88 @@ class SessionResponse(BaseModel):
     assessment_category: Optional[str] = None
     crisis_detected: Optional[bool] = None
 
+class BatchChatResult(BaseModel):
+    """One /batch item: the turn's response, or why it was not applied"""
+    session_id: str
+    response: Optional[SessionResponse] = None
+    error: Optional[str] = None
+
 # --- Session Management ---
+PHQ9_QUESTION_COUNT = 8  # Core scored questions; item 9 is covered by crisis detection
+PHQ9_UNANSWERED = 0xFF  # Sentinel byte for a question without a score yet
+
 def get_initial_session_state() -> Dict[str, Any]:
     """Create initial session state following ADK patterns"""
     return {
         "current_agent": "triage_agent",
-        "history": [],
-        "phq9_data": {},
+        "history": deque(maxlen=settings.SESSION_HISTORY_LIMIT),  # Oldest turns roll off
+        # One byte per core question (index = question - 1), unanswered until scored
+        "phq9_data": bytearray([PHQ9_UNANSWERED]) * PHQ9_QUESTION_COUNT,
         "phq9_score": 0,
         "phq9_current_question": 1,
         "assessment_category": None,
         "crisis_detected": False,
         "completed_assessment": False,
-        "created_at": str(uuid.uuid4())
+        "created_at": time.time(),
+        "last_seen": time.time()  # Refreshed every turn; idle sessions are evicted
     }
 
+# Agent state machine keyed by (current_agent, crisis_detected, completed_assessment).
+# A crisis always goes to the resource agent for emergency help; after triage the
+# user moves to assessment, and a completed assessment moves on to resources.
+# States not listed stay with the current agent.
+_TRANSITION: Dict[Tuple[str, bool, bool], str] = {
+    ("triage_agent", False, False): "assessment_agent",
+    ("triage_agent", False, True): "assessment_agent",
+    ("assessment_agent", False, True): "resource_agent",
+    **{
+        (agent, True, completed): "resource_agent"
+        for agent in ("triage_agent", "assessment_agent", "resource_agent")
+        for completed in (False, True)
+    },
+}
+
+def check_for_crisis(state: Dict[str, Any], user_message: str) -> None:
+    """
+    Flag a crisis before routing, so the turn that mentions it already goes to
+    the resource agent. Resource turns are skipped: they already get crisis context.
+    """
+    if state["current_agent"] == "resource_agent" or state.get("crisis_detected"):
+        return
+    if crisis_tool._detect_crisis(user_message)["crisis_detected"]:
+        state["crisis_detected"] = True
+
 def route_to_agent(state: Dict[str, Any], user_message: str) -> str:
     """ADK-style agent routing logic"""
     current_agent = state["current_agent"]
-    
-    # Crisis always goes to resource agent for emergency help
-    if state.get("crisis_detected"):
-        return "resource_agent"
-    
-    # Agent progression logic
-    if current_agent == "triage_agent":
-        # After triage, move to assessment if no crisis
-        if not state.get("crisis_detected"):
-            return "assessment_agent"
-    
-    elif current_agent == "assessment_agent":
-        # After assessment completion, move to resources
-        if state.get("completed_assessment"):
-            return "resource_agent"
-    
-    # Default: stay with current agent
-    return current_agent
+    key = (current_agent, bool(state.get("crisis_detected")), bool(state.get("completed_assessment")))
+    return _TRANSITION.get(key, current_agent)
 
-async def update_session_state(state: Dict[str, Any], agent_type: str, user_message: str, response: Any):
+def update_session_state(state: Dict[str, Any], agent_type: str, user_message: str, agent_reply: str):
     """Update session state based on agent interactions and tool usage"""
     
     # Update history
     state["history"].append({"role": "user", "text": user_message})
-    state["history"].append({"role": "agent", "text": str(response)})
+    state["history"].append({"role": "agent", "text": agent_reply})
     
     # State updates based on agent type
-    if agent_type == "triage_agent":
-        # Check for crisis in user message
-        crisis_check = await crisis_tool.detect_crisis(user_message)
-        if crisis_check.get("crisis_detected"):
-            state["crisis_detected"] = True
-    
-    elif agent_type == "assessment_agent":
+    # (crisis flags are set by check_for_crisis before routing)
+    if agent_type == "assessment_agent":
         # Process PHQ-9 responses
-        def _extract_score(response: str) -> int:
-            response_lower = response.lower()
-            if any(s in response_lower for s in ['0', 'not at all', 'none']):
-                return 0
-            elif any(s in response_lower for s in ['1', 'several days', 'some', 'a little']):
-                return 1
-            elif any(s in response_lower for s in ['2', 'more than half', 'many', 'a lot']):
-                return 2
-            elif any(s in response_lower for s in ['3', 'nearly every day', 'almost every day', 'every day', 'all the time']):
-                return 3
-            return None
-
-        score = _extract_score(user_message)
+        score = phq9_tool.extract_score(user_message)
         if score is not None:
             current_q = state["phq9_current_question"]
-            state["phq9_data"][current_q] = score
+            state["phq9_data"][current_q - 1] = score
             
             # Move to next question or complete assessment
-            next_q = current_q + 1
-            if next_q <= 9:
-                state["phq9_current_question"] = next_q
+            if current_q < PHQ9_QUESTION_COUNT:
+                state["phq9_current_question"] = current_q + 1
             else:
                 # Assessment complete
                 state["completed_assessment"] = True
-                state["phq9_score"] = sum(state["phq9_data"].values())
+                state["phq9_score"] = sum(b for b in state["phq9_data"] if b != PHQ9_UNANSWERED)
                 state["assessment_category"] = phq9_tool.classify_score(state["phq9_score"])
+                resource_batch_queue.enqueue(state["assessment_category"])
 
 # --- API Endpoints ---
 @app.get("/", response_class=HTMLResponse)
@@ -244,13 +411,16 @@ async def serve_home():
 
 @app.get("/api/health")
 async def health_check():
-    return {
+    health = {
         "status": "healthy", 
         "message": "DepraBuddy ADK Therapy API is running",
         "version": "2.0",
         "framework": "Google ADK",
-        "active_sessions": len(session_store)
     }
+    # Counting Redis sessions scans the whole keyspace, too costly for a probe
+    if isinstance(session_store, InMemorySessionStore):
+        health["active_sessions"] = await session_store.count()
+    return health
 
 
 @app.get("/agents")
@@ -279,8 +449,8 @@ async def list_agents():
 @app.post("/session/new")
 async def create_new_session() -> Dict[str, Any]:
     """Create a new ADK therapy session"""
-    session_id = str(uuid.uuid4())
-    session_store[session_id] = get_initial_session_state()
+    session_id = secrets.token_hex(16)  # 128 random bits, no UUID object
+    await session_store.set_state(session_id, get_initial_session_state())
     
     return {
         "session_id": session_id,
@@ -292,10 +462,10 @@ async def create_new_session() -> Dict[str, Any]:
 @app.get("/session/{session_id}")
 async def get_session_status(session_id: str) -> Dict[str, Any]:
     """Get the current status of a therapy session"""
-    if session_id not in session_store:
+    state = await session_store.get_state(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    state = session_store[session_id]
     return {
         "session_id": session_id,
         "current_agent": state["current_agent"],
@@ -310,8 +480,11 @@ async def get_session_status(session_id: str) -> Dict[str, Any]:
 @app.delete("/session/{session_id}")
 async def delete_session(session_id: str) -> Dict[str, str]:
     """Delete a therapy session"""
-    if session_id in session_store:
-        del session_store[session_id]
+    if await session_store.delete_state(session_id):
+        for runner in RUNNERS.values():
+            await runner.session_service.delete_session(
+                app_name=runner.app_name, user_id=ADK_USER_ID, session_id=session_id
+            )
         return {"message": f"Session {session_id} deleted"}
     else:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -319,83 +492,273 @@ async def delete_session(session_id: str) -> Dict[str, str]:
 @app.get("/sessions")
 async def list_sessions() -> Dict[str, Any]:
     """List all active sessions (for debugging)"""
+    sessions = await session_store.list_sessions()
     return {
-        "active_sessions": len(session_store),
-        "sessions": list(session_store.keys())
+        "active_sessions": len(sessions),
+        **await session_store.stats(),
+        "sessions": sessions
     }
 
 
-def extract_user_message(response: Any) -> str:
-    """Extracts the user-facing message from the raw ADK response."""
-    if not response:
-        return "I'm sorry, but I don't have a response for you."
+NO_RESPONSE_MESSAGE = "I'm sorry, but I don't have a response for you."
 
-    # The response is a list of Event objects. We want the last one.
-    last_event = response[-1]
+def event_text(event: Event) -> str:
+    """Concatenated text of an event's non-thought parts"""
+    if event.content is None or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text and not part.thought)
 
-    # The last event's content is a Content object. We want its parts.
-    parts = last_event.content.parts
-
-    # The last part of the content is a Part object. We want its text.
-    last_part = parts[-1]
-
-    return last_part.text
+def extract_user_message(response: Any) -> str:
+    """Extracts the user-facing message from the raw ADK response."""
+    # The response is a list of Event objects. Function call and function
+    # response events carry no text, so the reply is the text of the last
+    # event that has any, joined across its parts.
+    for event in reversed(response or ()):
+        text = event_text(event)
+        if text:
+            return text
+    return NO_RESPONSE_MESSAGE
+
+# In-flight chat turns keyed by (session_id, message hash). A duplicate request
+# (retry, double-click) awaits the running turn instead of calling Gemini again.
+_inflight_chats: Dict[Tuple[str, int], "asyncio.Task[SessionResponse]"] = {}
 
 @app.post("/chat", response_model=SessionResponse)
 async def chat_endpoint(request: ChatRequest) -> SessionResponse:
     """
     Main chat endpoint using ADK agent patterns
     """
-    session_id = request.session_id
-    user_message = request.user_message
-
+    key = (request.session_id, hash(request.user_message))
+    task = _inflight_chats.get(key)
+    if task is None:
+        task = asyncio.create_task(process_chat(request.session_id, request.user_message))
+        _inflight_chats[key] = task
+        task.add_done_callback(lambda _: _inflight_chats.pop(key, None))
+    # Shield the shared turn so one caller disconnecting does not cancel it for the others
+    return await asyncio.shield(task)
+
+async def process_chat(session_id: str, user_message: str) -> SessionResponse:
+    """Run one chat turn: route, call the agent and persist the updated session state"""
     # Get or create session
-    if session_id not in session_store:
-        session_store[session_id] = get_initial_session_state()
-        print(f"[ADK] New session created: {session_id}")
-    
-    state = session_store[session_id]
+    state = await session_store.get_state(session_id)
+    if state is None:
+        state = get_initial_session_state()
+        logger.info("New session created: %s", session_id)
     
     try:
-        # Determine which agent should handle this message
+        # Determine which agent should handle this message; a crisis goes straight to resources
+        previous_agent = state["current_agent"]
+        check_for_crisis(state, user_message)
         target_agent = route_to_agent(state, user_message)
         state["current_agent"] = target_agent
+        cached_reply = None
         
-        # Route to appropriate ADK agent
-        if target_agent == "triage_agent":
-            response = await triage_runner.run_debug(user_message)
-            
-        elif target_agent == "assessment_agent":
-            # Pass only the user's raw message to the assessment agent
-            response = await assessment_runner.run_debug(user_message)
-            
-        elif target_agent == "resource_agent":
-            # Add assessment context for personalized resources
-            context_info = ""
-            if state.get("assessment_category"):
-                context_info = f" Assessment Category: {state['assessment_category']}. PHQ-9 Score: {state.get('phq9_score', 'N/A')}."
-            if state.get("crisis_detected"):
-                context_info += " CRISIS SITUATION - Provide emergency resources."
-                
-            contextual_message = f"{user_message}{context_info}"
-            response = await resource_runner.run_debug(contextual_message)
+        # Triage and assessment agents get only the user's raw message
+        agent_message = user_message
+        cache_key = None
+        if target_agent == "resource_agent":
+            agent_message, cache_key = await build_resource_message(
+                state, user_message, opening=previous_agent != "resource_agent"
+            )
+            if cache_key is not None:
+                cached_reply = await response_cache.get(cache_key)
         
-        # Update session state based on the interaction
-        await update_session_state(state, target_agent, user_message, response)
+        if cached_reply is not None:
+            user_facing_message = cached_reply
+            cache_key = None  # Already cached
+        else:
+            response = await run_agent(target_agent, session_id, agent_message)
+            user_facing_message = extract_user_message(response)
         
-        user_facing_message = extract_user_message(response)
-
-        return SessionResponse(
-            session_id=session_id,
-            message=user_facing_message,
-            current_agent=target_agent,
-            phq9_score=state.get("phq9_score"),
-            assessment_category=state.get("assessment_category"),
-            crisis_detected=state.get("crisis_detected", False)
-        )
+        await finish_turn(session_id, state, target_agent, user_message, user_facing_message, cache_key)
+        return build_session_response(session_id, state, user_facing_message)
         
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise e
+    except Exception:
+        logger.exception("Chat turn failed for session %s", session_id)
+        raise
 
+@app.post("/batch", response_model=List[BatchChatResult])
+async def batch_chat_endpoint(request: BatchChatRequest) -> List[BatchChatResult]:
+    """
+    Run many chat turns in one request, e.g. to replay archived transcripts.
+    Turns for the same session run in order; different sessions run concurrently,
+    with Gemini calls still bounded by GEMINI_MAX_CONCURRENCY. Results are
+    returned in request order, each with either a response or an error. A failed
+    turn is not saved, so the session's later turns in the batch are skipped.
+    """
+    results: List[Optional[BatchChatResult]] = [None] * len(request.items)
+    turns_by_session: Dict[str, List[int]] = {}
+    for index, item in enumerate(request.items):
+        turns_by_session.setdefault(item.session_id, []).append(index)
+
+    async def run_session(session_id: str, indices: List[int]) -> None:
+        error = None
+        for index in indices:
+            if error is not None:
+                results[index] = BatchChatResult(session_id=session_id, error="skipped: an earlier turn failed")
+                continue
+            try:
+                response = await process_chat(session_id, request.items[index].user_message)
+                results[index] = BatchChatResult(session_id=session_id, response=response)
+            except HTTPException as e:
+                error = e.detail
+            except Exception:
+                error = "internal_error"  # process_chat already logged it
+            if error is not None:
+                results[index] = BatchChatResult(session_id=session_id, error=error)
+
+    await asyncio.gather(*(run_session(sid, indices) for sid, indices in turns_by_session.items()))
+    return results
+
+async def build_resource_message(state: Dict[str, Any], user_message: str, opening: bool) -> Tuple[str, Optional[str]]:
+    """
+    Add assessment context for personalized resources; returns (agent_message, cache_key).
+    Only the opening resource turn gets a cache key: its reply depends on nothing but
+    that context and the message, while later turns answer their own conversation.
+    """
+    context_info = ""
+    if state.get("assessment_category"):
+        context_info = f" Assessment Category: {state['assessment_category']}. PHQ-9 Score: {state.get('phq9_score', 'N/A')}."
+        prefetched_resources = await resource_batch_queue.get(state["assessment_category"])
+        if prefetched_resources:
+            context_info += f" Resource summary for this category: {prefetched_resources}"
+        else:
+            resource_batch_queue.enqueue(state["assessment_category"])
+    if state.get("crisis_detected"):
+        context_info += " CRISIS SITUATION - Provide emergency resources."
+
+    cache_key = None
+    if opening:
+        cache_key = make_cache_key(
+            state.get("assessment_category"), state.get("phq9_score"), state.get("crisis_detected"), user_message
+        )
+    return f"{user_message}{context_info}", cache_key
+
+async def finish_turn(
+    session_id: str,
+    state: Dict[str, Any],
+    target_agent: str,
+    user_message: str,
+    reply: str,
+    cache_key: Optional[str] = None,
+) -> None:
+    """Cache a fresh resource reply, then update and persist the session state"""
+    if cache_key is not None and reply != NO_RESPONSE_MESSAGE:
+        await response_cache.set(cache_key, reply)
+    update_session_state(state, target_agent, user_message, reply)
+    state["last_seen"] = time.time()
+    # update_session_state appended one user and one agent history entry
+    await session_store.set_state(session_id, state, history_appended=2)
+
+def build_session_response(session_id: str, state: Dict[str, Any], message: str) -> SessionResponse:
+    return SessionResponse(
+        session_id=session_id,
+        message=message,
+        current_agent=state["current_agent"],
+        phq9_score=state.get("phq9_score"),
+        assessment_category=state.get("assessment_category"),
+        crisis_detected=state.get("crisis_detected", False)
+    )
+
+def sse_message(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest) -> StreamingResponse:
+    """
+    Stream the agent's reply as Server-Sent Events while Gemini generates it.
+    Emits `delta` events with text chunks, then a `done` event carrying the
+    SessionResponse fields, or an `error` event if the turn fails mid-stream.
+    """
+    session_id, user_message = request.session_id, request.user_message
+    state = await session_store.get_state(session_id)
+    if state is None:
+        state = get_initial_session_state()
+        logger.info("New session created: %s", session_id)
+
+    previous_agent = state["current_agent"]
+    check_for_crisis(state, user_message)
+    target_agent = route_to_agent(state, user_message)
+    state["current_agent"] = target_agent
+
+    agent_message = user_message
+    cache_key = cached_reply = None
+    if target_agent == "resource_agent":
+        agent_message, cache_key = await build_resource_message(
+            state, user_message, opening=previous_agent != "resource_agent"
+        )
+        if cache_key is not None:
+            cached_reply = await response_cache.get(cache_key)
+    # Fail fast with a real status code; once streaming starts only an error event is possible
+    if cached_reply is None and gemini_breaker.is_open:
+        raise HTTPException(status_code=503, detail="upstream_throttled")
+
+    async def event_stream() -> AsyncIterator[str]:
+        chunks: List[str] = []  # Partial text since the last complete event
+        final_text = cached_reply
+        finished = False
+        try:
+            if cached_reply is not None:
+                yield sse_message("delta", {"text": cached_reply})
+            else:
+                async for event in stream_agent(target_agent, session_id, agent_message):
+                    text = event_text(event)
+                    if not text:
+                        continue
+                    if event.partial:
+                        chunks.append(text)
+                        yield sse_message("delta", {"text": text})
+                    else:
+                        # The complete event repeats the streamed chunks; only send it if none were
+                        if not chunks:
+                            yield sse_message("delta", {"text": text})
+                        chunks.clear()
+                        final_text = text
+            if not final_text and not chunks:
+                final_text = NO_RESPONSE_MESSAGE
+                yield sse_message("delta", {"text": final_text})
+            reply = final_text or "".join(chunks)
+            finished = True
+            await asyncio.shield(finish_turn(
+                session_id, state, target_agent, user_message, reply,
+                None if cached_reply is not None else cache_key,
+            ))
+            yield sse_message("done", build_session_response(session_id, state, reply).model_dump())
+        except HTTPException as e:
+            finished = True
+            yield sse_message("error", {"detail": e.detail})
+        except Exception:
+            finished = True
+            logger.exception("Chat stream failed for session %s", session_id)
+            yield sse_message("error", {"detail": "internal_error"})
+        finally:
+            # Client went away mid-stream: still record what it was sent, but do not cache it
+            partial_reply = final_text or "".join(chunks)
+            if not finished and partial_reply:
+                await asyncio.shield(finish_turn(session_id, state, target_agent, user_message, partial_reply))
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Sessions are only shared between worker processes through Redis; with the
+    # in-process store each worker would see a different subset of sessions
+    if settings.REDIS_URL:
+        # One process per core sidesteps the GIL for the CPU-bound parts of a turn
+        workers = settings.WEB_CONCURRENCY or os.cpu_count()
+    elif settings.WEB_CONCURRENCY > 1:
+        raise SystemExit("WEB_CONCURRENCY > 1 requires REDIS_URL: in-process sessions are not shared between workers")
+    else:
+        workers = 1
+
+    # uvloop/httptools come with uvicorn[standard]
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+    )
@@ -0,0 +1,97 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+_WORD_RE = re.compile(r"[\w']+")
+
+
+def make_cache_key(
+    assessment_category: Optional[str], phq9_score: Optional[int], crisis_detected: bool, user_message: str
+) -> str:
+    """
+    Build a deterministic key from the discrete resource-agent context plus the
+    normalized message, so "What now?" and "what now" share one cached answer.
+    The exact score is part of the key because the prompt quotes it.
+    """
+    normalized = " ".join(_WORD_RE.findall(user_message.casefold()))
+    raw_key = f"{assessment_category or ''}|{phq9_score if phq9_score is not None else ''}|{int(bool(crisis_detected))}|{normalized}"
+    return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+class InMemoryResponseCache:
+    """Process-local LRU cache of resource agent replies with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: int = 86400):
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    async def set(self, key: str, text: str, ttl_seconds: Optional[int] = None) -> None:
+        self._entries[key] = (time.time() + (ttl_seconds or self.ttl_seconds), text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def claim(self, key: str, ttl_seconds: int) -> bool:
+        """Store a marker under key unless a live entry exists; True if this caller got it."""
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, "", ttl_seconds)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisResponseCache:
+    """Redis-backed reply cache shared by every worker; entries expire through SETEX."""
+
+    def __init__(self, url: str, ttl_seconds: int, key_prefix: str = "depre:reply:"):
+        # Optional dependency: only needed when REDIS_URL is configured
+        import redis.asyncio as redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(f"{self.key_prefix}{key}")
+
+    async def set(self, key: str, text: str, ttl_seconds: Optional[int] = None) -> None:
+        await self._redis.setex(f"{self.key_prefix}{key}", ttl_seconds or self.ttl_seconds, text)
+
+    async def claim(self, key: str, ttl_seconds: int) -> bool:
+        """SET NX: exactly one worker gets the key until it expires or is deleted."""
+        return bool(await self._redis.set(f"{self.key_prefix}{key}", "", nx=True, ex=ttl_seconds))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(f"{self.key_prefix}{key}")
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_response_cache(settings) -> "InMemoryResponseCache | RedisResponseCache":
+    """Use Redis when REDIS_URL is set, otherwise cache replies in process memory."""
+    if settings.REDIS_URL:
+        return RedisResponseCache(settings.REDIS_URL, settings.RESPONSE_CACHE_TTL_SECONDS)
+    return InMemoryResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    )
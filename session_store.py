@@ -0,0 +1,189 @@
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+
+def _encode_value(value: Any) -> Any:
+    """JSON fallback for the non-JSON session fields"""
+    if isinstance(value, bytearray):
+        return value.hex()  # phq9_data: fixed 8 bytes -> 16 hex chars
+    if isinstance(value, deque):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__} in session state")
+
+
+def _copy_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a session state deep enough that the history deque and phq9_data are not shared"""
+    copied = dict(state)
+    history = state.get("history")
+    if history is not None:
+        copied["history"] = deque(history, maxlen=history.maxlen)
+    if state.get("phq9_data") is not None:
+        copied["phq9_data"] = bytearray(state["phq9_data"])
+    return copied
+
+
+class InMemorySessionStore:
+    """
+    Process-local session store with an LRU cap.
+    Sessions live in this worker's heap only, so they are lost on restart and
+    are not visible to other uvicorn workers. Every read or write marks a session
+    as most recently used; once max_sessions is reached the least recently used
+    session is evicted. evict_idle drops sessions whose last_seen is too old.
+    Like RedisSessionStore, reads and writes copy the state, so changes to a
+    loaded state are only visible to other requests once set_state saves them.
+    """
+
+    def __init__(self, max_sessions: int = 10_000):
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.max_sessions = max_sessions
+        self.evictions = 0
+        self.expirations = 0
+
+    async def connect(self) -> None:
+        pass
+
+    async def get_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        state = self._sessions.get(session_id)
+        if state is None:
+            return None
+        self._sessions.move_to_end(session_id)
+        return _copy_state(state)
+
+    async def set_state(self, session_id: str, state: Dict[str, Any], history_appended: int = 0) -> None:
+        # history_appended only matters to Redis; the whole history is copied here
+        self._sessions[session_id] = _copy_state(state)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    async def delete_state(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    async def evict_idle(self, max_idle_seconds: float) -> int:
+        """Delete sessions not seen for max_idle_seconds; returns how many were removed."""
+        cutoff = time.time() - max_idle_seconds
+        idle = [sid for sid, state in self._sessions.items() if state["last_seen"] < cutoff]
+        for session_id in idle:
+            del self._sessions[session_id]
+        self.expirations += len(idle)
+        return len(idle)
+
+    async def list_sessions(self) -> List[str]:
+        return list(self._sessions.keys())
+
+    async def count(self) -> int:
+        return len(self._sessions)
+
+    async def stats(self) -> Dict[str, int]:
+        return {
+            "max_sessions": self.max_sessions,
+            "evicted_sessions": self.evictions,
+            "expired_sessions": self.expirations,
+        }
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisSessionStore:
+    """
+    Redis-backed session store shared by every worker.
+    Each session is a hash (depre:session:{id}) with one JSON-encoded field per
+    state key, and its history is a separate list (depre:history:{id}). Every
+    write sets the hash fields, RPUSHes only the newly appended history entries,
+    LTRIMs the list to history_limit and refreshes both TTLs in a single
+    pipelined transaction, so idle sessions expire after ttl_seconds without any
+    cleanup loop and a turn never re-sends the whole history. The bounded
+    history deque is rebuilt on load, and the phq9_data bytearray round-trips
+    as a hex string.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: int,
+        history_limit: int,
+        key_prefix: str = "depre:session:",
+        history_prefix: str = "depre:history:",
+    ):
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self.history_limit = history_limit
+        self.key_prefix = key_prefix
+        self.history_prefix = history_prefix
+        self._redis = None
+
+    async def connect(self) -> None:
+        """Create the client once the event loop is running and fail fast if Redis is unreachable."""
+        # Optional dependency: only needed when REDIS_URL is configured
+        import redis.asyncio as redis
+
+        self._redis = redis.Redis.from_url(self.url, decode_responses=True)
+        await self._redis.ping()
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}"
+
+    def _history_key(self, session_id: str) -> str:
+        return f"{self.history_prefix}{session_id}"
+
+    async def get_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._key(session_id))
+            pipe.lrange(self._history_key(session_id), 0, -1)
+            fields, history = await pipe.execute()
+        if not fields:
+            return None
+        state = {field: json.loads(value) for field, value in fields.items()}
+        state["history"] = deque(map(json.loads, history), maxlen=self.history_limit)
+        state["phq9_data"] = bytearray.fromhex(state["phq9_data"])
+        return state
+
+    async def set_state(self, session_id: str, state: Dict[str, Any], history_appended: int = 0) -> None:
+        """Persist the state; history_appended is how many history entries were added since get_state."""
+        key = self._key(session_id)
+        history_key = self._history_key(session_id)
+        mapping = {
+            field: json.dumps(value, default=_encode_value)
+            for field, value in state.items()
+            if field != "history"
+        }
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.ttl_seconds)
+            if history_appended:
+                new_entries = list(state["history"])[-history_appended:]
+                pipe.rpush(history_key, *map(json.dumps, new_entries))
+                pipe.ltrim(history_key, -self.history_limit, -1)
+                pipe.expire(history_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def delete_state(self, session_id: str) -> bool:
+        return await self._redis.delete(self._key(session_id), self._history_key(session_id)) > 0
+
+    async def evict_idle(self, max_idle_seconds: float) -> int:
+        # Idle sessions already expire through the key TTL
+        return 0
+
+    async def list_sessions(self) -> List[str]:
+        prefix_length = len(self.key_prefix)
+        return [key[prefix_length:] async for key in self._redis.scan_iter(match=f"{self.key_prefix}*")]
+
+    async def stats(self) -> Dict[str, int]:
+        # Redis evicts idle sessions itself through the key TTL
+        return {"session_ttl_seconds": self.ttl_seconds}
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+
+def create_session_store(settings) -> "InMemorySessionStore | RedisSessionStore":
+    """Use Redis when REDIS_URL is set, otherwise keep sessions in process memory."""
+    if settings.REDIS_URL:
+        return RedisSessionStore(settings.REDIS_URL, settings.SESSION_TTL_SECONDS, settings.SESSION_HISTORY_LIMIT)
+    return InMemorySessionStore(max_sessions=settings.SESSION_MAX_ENTRIES)
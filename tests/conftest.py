@@ -0,0 +1,75 @@
+import os
+
+# config.get_settings() refuses to load without a key; tests never reach Gemini
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+import main
+from response_cache import InMemoryResponseCache
+from session_store import InMemorySessionStore
+
+
+class FakeRunner:
+    """
+    Stands in for an InMemoryRunner: records each message and the ADK session it
+    ran in, and replies with canned text, or fails like a throttled Gemini call
+    for messages containing any text listed in fail_on.
+    """
+
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self.app_name = agent_name
+        self.session_service = InMemorySessionService()
+        self.messages = []
+        self.session_ids = []
+        self.fail_on = set()
+
+    async def run_debug(self, message: str, *, user_id: str, session_id: str, **kwargs):
+        session_kwargs = {"app_name": self.app_name, "user_id": user_id, "session_id": session_id}
+        if await self.session_service.get_session(**session_kwargs) is None:
+            await self.session_service.create_session(**session_kwargs)
+        self.messages.append(message)
+        self.session_ids.append(session_id)
+        if any(trigger in message for trigger in self.fail_on):
+            raise HTTPException(status_code=503, detail="upstream_throttled")
+        return [self._event(f"{self.agent_name} reply")]
+
+    async def run_async(self, *, user_id: str, session_id: str, new_message: types.Content, **kwargs):
+        """Stream the canned reply as two partial chunks followed by the complete event"""
+        message = new_message.parts[0].text
+        self.messages.append(message)
+        self.session_ids.append(session_id)
+        if any(trigger in message for trigger in self.fail_on):
+            raise HTTPException(status_code=503, detail="upstream_throttled")
+        yield self._event(f"{self.agent_name} ", partial=True)
+        yield self._event("reply", partial=True)
+        yield self._event(f"{self.agent_name} reply")
+
+    def _event(self, text: str, partial: bool = False) -> Event:
+        return Event(
+            author=self.agent_name,
+            partial=partial,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+        )
+
+
+@pytest.fixture
+def runners(monkeypatch):
+    fakes = {name: FakeRunner(name) for name in ("triage_agent", "assessment_agent", "resource_agent")}
+    for name, runner in fakes.items():
+        monkeypatch.setitem(main.RUNNERS, name, runner)
+    return fakes
+
+
+@pytest.fixture
+def client(monkeypatch, runners):
+    # Fresh stores per test; the lifespan is not run, so no real agents are built
+    monkeypatch.setattr(main, "session_store", InMemorySessionStore())
+    monkeypatch.setattr(main, "response_cache", InMemoryResponseCache())
+    return TestClient(main.app)
@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from batch_queue import BatchQueue
+from response_cache import InMemoryResponseCache
+
+
+class FakeBatches:
+    """Completes every batch job immediately with one long answer per request."""
+
+    def __init__(self):
+        self.submitted = []
+
+    async def create(self, model, src, config):
+        self.submitted.append(src)
+        responses = [
+            SimpleNamespace(response=SimpleNamespace(text="Talk to your GP. " * 100))
+            for _ in src
+        ]
+        return SimpleNamespace(
+            name="batches/1",
+            state=types.JobState.JOB_STATE_SUCCEEDED,
+            dest=SimpleNamespace(inlined_responses=responses),
+        )
+
+
+def make_client(batches):
+    return SimpleNamespace(aio=SimpleNamespace(batches=batches))
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_a_store_submit_each_category_once():
+    store = InMemoryResponseCache()
+    batches = FakeBatches()
+    first, second = (BatchQueue(model="m", store=store) for _ in range(2))
+    for queue in (first, second):
+        queue._client = make_client(batches)
+        queue.enqueue("Mild depression")
+
+    await first._flush()
+    await second._flush()
+
+    assert len(batches.submitted) == 1
+    summary = await second.get("Mild depression")
+    assert summary is not None and len(summary) <= first.max_summary_chars
+
+
+@pytest.mark.asyncio
+async def test_category_claimed_by_another_worker_is_not_submitted():
+    store = InMemoryResponseCache()
+    batches = FakeBatches()
+    queue = BatchQueue(model="m", store=store)
+    queue._client = make_client(batches)
+    await store.claim("resources:Mild depression:claim", ttl_seconds=60)
+
+    queue.enqueue("Mild depression")
+    await queue._flush()
+
+    assert batches.submitted == []
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+import main
+
+
+def test_crisis_message_on_new_session_goes_to_resource_agent(client, runners):
+    session_id = client.post("/session/new").json()["session_id"]
+
+    reply = client.post("/chat", json={"session_id": session_id, "user_message": "I want to kill myself"}).json()
+
+    assert reply["current_agent"] == "resource_agent"
+    assert reply["crisis_detected"] is True
+    assert not runners["assessment_agent"].messages
+    assert "CRISIS SITUATION" in runners["resource_agent"].messages[0]
+
+
+def test_ordinary_first_message_starts_assessment(client, runners):
+    reply = client.post("/chat", json={"session_id": "s1", "user_message": "I have been feeling low"}).json()
+
+    assert reply["current_agent"] == "assessment_agent"
+    assert reply["crisis_detected"] is False
+
+
+def test_each_session_runs_in_its_own_adk_session(client, runners):
+    for session_id in ("a", "b", "a"):
+        client.post("/chat", json={"session_id": session_id, "user_message": "hello"})
+    assert runners["assessment_agent"].session_ids == ["a", "b", "a"]
+
+    assert client.delete("/session/a").status_code == 200
+    service = runners["assessment_agent"].session_service
+    assert asyncio.run(service.get_session(app_name="assessment_agent", user_id=main.ADK_USER_ID, session_id="a")) is None
+    assert asyncio.run(service.get_session(app_name="assessment_agent", user_id=main.ADK_USER_ID, session_id="b")) is not None
+
+
+def test_batch_reports_failed_items_without_dropping_other_sessions(client, runners):
+    runners["assessment_agent"].fail_on.add("boom")
+    items = [
+        {"session_id": "ok", "user_message": "hello"},
+        {"session_id": "bad", "user_message": "boom"},
+        {"session_id": "ok", "user_message": "2"},
+        {"session_id": "bad", "user_message": "2"},
+    ]
+
+    results = client.post("/batch", json={"items": items}).json()
+
+    assert [r["session_id"] for r in results] == ["ok", "bad", "ok", "bad"]
+    assert results[0]["response"]["message"] == "assessment_agent reply"
+    assert results[1] == {"session_id": "bad", "response": None, "error": "upstream_throttled"}
+    assert results[2]["error"] is None
+    assert results[3]["error"].startswith("skipped")
+    # The failed turn was not saved, and the skipped one never ran
+    assert client.get("/session/bad").status_code == 404
+
+
+def test_failed_turn_leaves_existing_session_unchanged(client, runners):
+    client.post("/chat", json={"session_id": "s", "user_message": "hello"})
+    before = client.get("/session/s").json()
+    runners["assessment_agent"].fail_on.add("boom")
+
+    results = client.post("/batch", json={"items": [{"session_id": "s", "user_message": "boom"}]}).json()
+
+    assert results[0]["error"] == "upstream_throttled"
+    assert client.get("/session/s").json() == before
+
+
+def test_failed_crisis_turn_does_not_route_saved_session(client, runners):
+    client.post("/chat", json={"session_id": "s", "user_message": "hello"})
+    runners["resource_agent"].fail_on.add("kill myself")
+
+    results = client.post("/batch", json={"items": [{"session_id": "s", "user_message": "I want to kill myself"}]}).json()
+
+    assert results[0]["error"] == "upstream_throttled"
+    # Neither the crisis flag nor the route to the resource agent was saved
+    state = client.get("/session/s").json()
+    assert state["current_agent"] == "assessment_agent"
+    assert state["crisis_detected"] is False
+
+
+def test_batch_rejects_more_than_max_items(client):
+    items = [{"session_id": "s", "user_message": "hi"}] * (main.settings.BATCH_MAX_ITEMS + 1)
+
+    assert client.post("/batch", json={"items": items}).status_code == 422
+
+
+def test_only_opening_resource_replies_are_shared_between_sessions(client, runners):
+    resource_runner = runners["resource_agent"]
+    for session_id in ("a", "b"):
+        reply = client.post("/chat", json={"session_id": session_id, "user_message": "I want to kill myself"}).json()
+        assert reply["message"] == "resource_agent reply"
+    # The second session's opening crisis turn was served from the cache
+    assert len(resource_runner.messages) == 1
+
+    for session_id in ("a", "b"):
+        client.post("/chat", json={"session_id": session_id, "user_message": "thanks"})
+    # Follow-ups depend on their own conversation, so each one reaches the agent
+    assert len(resource_runner.messages) == 3
+
+
+def test_health_reports_in_process_session_count(client):
+    client.post("/session/new")
+
+    assert client.get("/api/health").json()["active_sessions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_concurrent_chats_share_one_agent_call(client, runners, monkeypatch):
+    runner = runners["assessment_agent"]
+    release = asyncio.Event()
+    run_debug = runner.run_debug
+
+    async def slow_run_debug(message, **kwargs):
+        await release.wait()
+        return await run_debug(message, **kwargs)
+
+    monkeypatch.setattr(runner, "run_debug", slow_run_debug)
+    request = main.ChatRequest(session_id="s", user_message="hello")
+    calls = [asyncio.create_task(main.chat_endpoint(request)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    first, second = await asyncio.gather(*calls)
+
+    assert runner.messages == ["hello"]
+    assert first == second
+    assert len((await main.session_store.get_state("s"))["history"]) == 2
+    assert not main._inflight_chats
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import main
+from circuit_breaker import CircuitBreaker
+
+
+def stream(client, session_id, user_message):
+    """POST /chat/stream and return the response with its parsed (event, data) pairs"""
+    response = client.post("/chat/stream", json={"session_id": session_id, "user_message": user_message})
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        if block:
+            event_line, data_line = block.split("\n")
+            events.append((event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))))
+    return response, events
+
+
+def test_stream_sends_deltas_then_done_and_saves_the_turn(client, runners):
+    response, events = stream(client, "s", "I have been feeling low")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    # The complete event repeats the partial chunks, so it is not sent again
+    assert events[:-1] == [("delta", {"text": "assessment_agent "}), ("delta", {"text": "reply"})]
+    done_event, done = events[-1]
+    assert done_event == "done"
+    assert done["message"] == "assessment_agent reply"
+    assert done["current_agent"] == "assessment_agent"
+    assert runners["assessment_agent"].session_ids == ["s"]
+
+    state = client.get("/session/s").json()
+    assert state["current_agent"] == "assessment_agent"
+    assert state["history_length"] == 2
+
+
+def test_stream_serves_cached_opening_reply(client, runners):
+    stream(client, "a", "I want to kill myself")
+    _, events = stream(client, "b", "I want to kill myself")
+
+    assert events[0] == ("delta", {"text": "resource_agent reply"})
+    assert events[-1][0] == "done"
+    assert len(runners["resource_agent"].messages) == 1
+    assert client.get("/session/b").json()["crisis_detected"] is True
+
+
+def test_stream_fails_with_503_before_streaming_while_breaker_is_open(client, runners, monkeypatch):
+    breaker = CircuitBreaker()
+    breaker.record_throttle()
+    monkeypatch.setattr(main, "gemini_breaker", breaker)
+
+    response = client.post("/chat/stream", json={"session_id": "s", "user_message": "hello"})
+
+    assert response.status_code == 503
+    assert not runners["assessment_agent"].messages
+    assert client.get("/session/s").status_code == 404
+
+
+def test_stream_error_event_does_not_save_the_turn(client, runners):
+    runners["assessment_agent"].fail_on.add("boom")
+
+    _, events = stream(client, "s", "boom")
+
+    assert events == [("error", {"detail": "upstream_throttled"})]
+    assert client.get("/session/s").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_stream_saves_partial_reply_when_client_disconnects(client, runners):
+    request = main.ChatRequest(session_id="s", user_message="I have been feeling low")
+    response = await main.chat_stream_endpoint(request)
+
+    body = response.body_iterator
+    assert (await anext(body)).startswith("event: delta")
+    await body.aclose()  # What Starlette does when the client goes away
+
+    state = await main.session_store.get_state("s")
+    assert state["current_agent"] == "assessment_agent"
+    assert state["history"][-1]["text"] == "assessment_agent "
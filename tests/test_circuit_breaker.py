@@ -0,0 +1,71 @@
+import pytest
+from fastapi import HTTPException
+from google.genai import errors
+
+import circuit_breaker
+import main
+from circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_cooldown_doubles_up_to_max_and_resets_on_success(clock):
+    breaker = CircuitBreaker(cooldown=5, max_cooldown=15)
+    assert not breaker.is_open
+
+    breaker.record_throttle()
+    assert breaker.is_open
+    clock[0] += 5
+    assert not breaker.is_open
+
+    breaker.record_throttle()  # Second throttle in a row: 10s
+    clock[0] += 9.9
+    assert breaker.is_open
+    clock[0] += 0.1
+    assert not breaker.is_open
+
+    breaker.record_throttle()  # Capped at max_cooldown
+    clock[0] += 15
+    assert not breaker.is_open
+
+    breaker.record_success()
+    breaker.record_throttle()
+    clock[0] += 5
+    assert not breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_throttled_agent_call_opens_breaker(runners, monkeypatch, clock):
+    breaker = CircuitBreaker(cooldown=5)
+    monkeypatch.setattr(main, "gemini_breaker", breaker)
+    runner = runners["triage_agent"]
+    run_debug = runner.run_debug
+    throttling = [True]
+
+    async def throttled(message, **kwargs):
+        if throttling[0]:
+            runner.messages.append(message)
+            raise errors.ClientError(429, {"error": {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+        return await run_debug(message, **kwargs)
+
+    monkeypatch.setattr(runner, "run_debug", throttled)
+    with pytest.raises(HTTPException) as exc_info:
+        await main.run_agent("triage_agent", "s", "hello")
+    assert exc_info.value.status_code == 503
+    assert breaker.is_open
+
+    # While open, turns fail fast without calling Gemini
+    with pytest.raises(HTTPException):
+        await main.run_agent("triage_agent", "s", "hello again")
+    assert runner.messages == ["hello"]
+
+    # After the cooldown a successful call closes it and resets the cooldown
+    clock[0] += 5
+    throttling[0] = False
+    await main.run_agent("triage_agent", "s", "hello")
+    assert breaker._cooldown == 5
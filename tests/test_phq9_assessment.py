@@ -0,0 +1,51 @@
+import pytest
+
+from tools.phq9_assessment import PHQ9AssessmentTool
+
+tool = PHQ9AssessmentTool()
+INVALID = {"error": "Invalid question number."}
+
+
+@pytest.mark.parametrize("question_number", [2, 2.0, "2"])
+def test_administer_question_accepts_whole_numbers_in_any_form(question_number):
+    assert tool._administer_question(question_number) == {"question_text": PHQ9AssessmentTool.PHQ9_QUESTIONS[1]}
+
+
+@pytest.mark.parametrize("question_number", [0, 10, 1.5, "two", None, float("nan")])
+def test_administer_question_rejects_other_input(question_number):
+    assert tool._administer_question(question_number) == INVALID
+
+
+@pytest.mark.parametrize("answer, score", [
+    ("2", 2),
+    (" 0 ", 0),
+    ("I'd say 3", 3),
+    ("3, or maybe 1", 3),
+    ("Several days", 1),
+    ("Sometimes, I guess", 1),
+    ("nearly every day", 3),
+    ("NOT AT ALL", 0),
+])
+def test_extract_score_reads_digits_and_phrases(answer, score):
+    assert tool.extract_score(answer) == score
+
+
+@pytest.mark.parametrize("answer", ["10", "12 times", "something", "4", "I don't know"])
+def test_extract_score_ignores_digits_inside_numbers_and_partial_words(answer):
+    assert tool.extract_score(answer) is None
+
+
+@pytest.mark.parametrize("score, category", [
+    (0, "Minimal or no depression"),
+    (4, "Minimal or no depression"),
+    (5, "Mild depression"),
+    (9, "Mild depression"),
+    (10, "Moderate depression"),
+    (14, "Moderate depression"),
+    (15, "Moderately severe depression"),
+    (19, "Moderately severe depression"),
+    (20, "Severe depression"),
+    (24, "Severe depression"),
+])
+def test_classify_score_boundaries(score, category):
+    assert tool.classify_score(score) == category
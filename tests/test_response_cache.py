@@ -0,0 +1,15 @@
+from response_cache import make_cache_key
+
+
+def test_cache_key_normalizes_case_and_punctuation():
+    assert make_cache_key("Mild depression", 7, False, "What now?") == make_cache_key("Mild depression", 7, False, "what now")
+
+
+def test_cache_key_includes_the_score_quoted_in_the_prompt():
+    assert make_cache_key("Mild depression", 7, False, "what now") != make_cache_key("Mild depression", 9, False, "what now")
+
+
+def test_cache_key_keeps_non_ascii_words():
+    assert make_cache_key(None, 0, True, "Я хочу умереть") != make_cache_key(None, 0, True, "Мне нужна помощь")
+    assert make_cache_key(None, 0, False, "Café?") == make_cache_key(None, 0, False, "café")
+    assert make_cache_key(None, 0, False, "café") != make_cache_key(None, 0, False, "caf")
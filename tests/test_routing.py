@@ -0,0 +1,34 @@
+import itertools
+
+import pytest
+
+from main import route_to_agent
+
+AGENTS = ("triage_agent", "assessment_agent", "resource_agent")
+
+
+def reference_route(current_agent, crisis_detected, completed_assessment):
+    """The if/elif routing that the transition table replaced"""
+    if crisis_detected:
+        return "resource_agent"
+    if current_agent == "triage_agent":
+        return "assessment_agent"
+    if current_agent == "assessment_agent" and completed_assessment:
+        return "resource_agent"
+    return current_agent
+
+
+@pytest.mark.parametrize("current_agent, crisis_detected, completed_assessment",
+                         list(itertools.product(AGENTS, (False, True), (False, True))))
+def test_transition_table_matches_reference_routing(current_agent, crisis_detected, completed_assessment):
+    state = {
+        "current_agent": current_agent,
+        "crisis_detected": crisis_detected,
+        "completed_assessment": completed_assessment,
+    }
+
+    assert route_to_agent(state, "hello") == reference_route(current_agent, crisis_detected, completed_assessment)
+
+
+def test_missing_flags_count_as_false():
+    assert route_to_agent({"current_agent": "assessment_agent"}, "hello") == "assessment_agent"
@@ -0,0 +1,185 @@
+import json
+import time
+
+import pytest
+
+import main
+from session_store import InMemorySessionStore, RedisSessionStore
+
+
+@pytest.mark.asyncio
+async def test_in_memory_store_copies_state_on_get_and_set():
+    store = InMemorySessionStore()
+    state = main.get_initial_session_state()
+    await store.set_state("s", state)
+
+    state["current_agent"] = "resource_agent"
+    state["history"].append({"role": "user", "text": "hi"})
+    state["phq9_data"][0] = 2
+    loaded = await store.get_state("s")
+    assert loaded["current_agent"] == "triage_agent"
+    assert not loaded["history"]
+    assert loaded["phq9_data"][0] == 0xFF
+
+    loaded["history"].append({"role": "user", "text": "hi"})
+    assert not (await store.get_state("s"))["history"]
+    assert loaded["history"].maxlen == main.settings.SESSION_HISTORY_LIMIT
+
+
+@pytest.mark.asyncio
+async def test_evict_idle_expires_only_idle_sessions():
+    store = InMemorySessionStore()
+    now = time.time()
+    for session_id, idle_seconds in (("idle", 120), ("active", 10)):
+        state = main.get_initial_session_state()
+        state["last_seen"] = now - idle_seconds
+        await store.set_state(session_id, state)
+
+    assert await store.evict_idle(60) == 1
+    assert await store.list_sessions() == ["active"]
+    assert (await store.stats())["expired_sessions"] == 1
+    assert (await store.stats())["evicted_sessions"] == 0
+
+
+class FakeRedis:
+    """
+    The few redis.asyncio commands RedisSessionStore uses, over plain dicts.
+    Pipelines queue commands and apply them in order on execute, and every
+    command is logged so tests can check what was actually sent.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.lists = {}
+        self.ttls = {}
+        self.commands = []
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _run(self, name, *args, **kwargs):
+        self.commands.append((name, args, kwargs))
+        return getattr(self, f"_{name}")(*args, **kwargs)
+
+    def _hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+        return len(mapping)
+
+    def _hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def _rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    def _ltrim(self, key, start, end):
+        values = self.lists.get(key, [])
+        self.lists[key] = values[start:len(values) + end + 1 if end < 0 else end + 1]
+        return True
+
+    def _lrange(self, key, start, end):
+        values = self.lists.get(key, [])
+        return values[start:len(values) + end + 1 if end < 0 else end + 1]
+
+    def _expire(self, key, seconds):
+        self.ttls[key] = seconds
+        return True
+
+    def _delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            found = self.hashes.pop(key, None) is not None or self.lists.pop(key, None) is not None
+            deleted += found
+        return deleted
+
+    async def delete(self, *keys):
+        return self._run("delete", *keys)
+
+    async def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        for key in list(self.hashes):
+            if key.startswith(prefix):
+                yield key
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._queued = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._queued.append((name, args, kwargs))
+
+    async def execute(self):
+        queued, self._queued = self._queued, []
+        return [self._redis._run(name, *args, **kwargs) for name, args, kwargs in queued]
+
+
+@pytest.fixture
+def redis_store():
+    store = RedisSessionStore("redis://unused", ttl_seconds=60, history_limit=3)
+    store._redis = FakeRedis()
+    return store
+
+
+def turn(state, user_message):
+    state["history"].append({"role": "user", "text": user_message})
+    state["history"].append({"role": "agent", "text": "reply"})
+
+
+@pytest.mark.asyncio
+async def test_redis_store_writes_one_json_field_per_state_key(redis_store):
+    state = main.get_initial_session_state()
+    state["phq9_data"][0] = 2
+    await redis_store.set_state("s", state)
+
+    fields = redis_store._redis.hashes["depre:session:s"]
+    assert "history" not in fields
+    assert json.loads(fields["current_agent"]) == "triage_agent"
+    assert json.loads(fields["phq9_data"]) == "02ffffffffffffff"
+    assert redis_store._redis.ttls == {"depre:session:s": 60}
+
+    loaded = await redis_store.get_state("s")
+    assert loaded["phq9_data"] == state["phq9_data"]
+    assert isinstance(loaded["phq9_data"], bytearray)
+    assert {k: v for k, v in loaded.items() if k != "history"} == {k: v for k, v in state.items() if k != "history"}
+
+
+@pytest.mark.asyncio
+async def test_redis_store_pushes_only_new_history_and_trims_it(redis_store):
+    state = main.get_initial_session_state()
+    turn(state, "one")
+    await redis_store.set_state("s", state, history_appended=2)
+
+    state = await redis_store.get_state("s")
+    turn(state, "two")
+    await redis_store.set_state("s", state, history_appended=2)
+
+    pushes = [args for name, args, _ in redis_store._redis.commands if name == "rpush"]
+    assert [len(args) - 1 for args in pushes] == [2, 2]
+    assert redis_store._redis.ttls["depre:history:s"] == 60
+    loaded = await redis_store.get_state("s")
+    # history_limit is 3, so the oldest entry was trimmed away
+    assert list(loaded["history"]) == list(state["history"])[-3:]
+    assert loaded["history"][0] == {"role": "agent", "text": "reply"}
+    assert loaded["history"].maxlen == 3
+
+
+@pytest.mark.asyncio
+async def test_redis_store_deletes_state_and_history(redis_store):
+    state = main.get_initial_session_state()
+    turn(state, "one")
+    await redis_store.set_state("s", state, history_appended=2)
+    assert await redis_store.list_sessions() == ["s"]
+
+    assert await redis_store.delete_state("s") is True
+    assert ("delete", ("depre:session:s", "depre:history:s"), {}) in redis_store._redis.commands
+    assert redis_store._redis.lists == {}
+    assert await redis_store.get_state("s") is None
+    assert await redis_store.delete_state("s") is False
@@ -1,24 +1,25 @@
+import re
 from google.adk.tools.function_tool import FunctionTool
 from typing import Dict, Any
 
 class CrisisDetectionTool:
-    
+    CRISIS_INDICATORS = (
+        "kill myself", "suicide", "end it all", "want to die",
+        "harm myself", "self harm", "not worth living",
+        "better off dead", "can't go on", "end my life"
+    )
+    # All indicators compiled into one case-insensitive alternation, matched in a single pass
+    _CRISIS_PATTERN = re.compile("|".join(map(re.escape, CRISIS_INDICATORS)), re.IGNORECASE)
+
     def __init__(self):
         self.detect_crisis = FunctionTool(self._detect_crisis)
 
-    async def _detect_crisis(self, user_message: str) -> Dict[str, Any]:
+    def _detect_crisis(self, user_message: str) -> Dict[str, Any]:
         """
         Detect crisis situations in user messages.
         Returns crisis response if detected, otherwise empty.
         """
-        crisis_indicators = [
-            "kill myself", "suicide", "end it all", "want to die",
-            "harm myself", "self harm", "not worth living",
-            "better off dead", "can't go on", "end my life"
-        ]
-        
-        message_lower = user_message.lower()
-        if any(indicator in message_lower for indicator in crisis_indicators):
+        if self._CRISIS_PATTERN.search(user_message):
             return {
                 "crisis_detected": True,
                 "response": """🚨 **I'm deeply concerned about what you're sharing.**
@@ -30,5 +31,5 @@ class CrisisDetectionTool:
 
 You are not alone, and there are people who want to help you right now."""
             }
-        
-        return {"crisis_detected": False, "response": ""}
\ No newline at end of file
+
+        return {"crisis_detected": False, "response": ""}
@@ -1,5 +1,8 @@
+import re
+from bisect import bisect_right
+from functools import lru_cache
 from google.adk.tools.function_tool import FunctionTool
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class PHQ9AssessmentTool:
     """
@@ -13,28 +16,60 @@ class PHQ9AssessmentTool:
     Rule out bipolar disorder, normal bereavement, and medical disorders causing depression.
 
     """
-    PHQ9_QUESTIONS = {
-        1: "Little interest or pleasure in doing things?",
-        2: "Feeling down, depressed, or hopeless?",
-        3: "Trouble falling or staying asleep, or sleeping too much?",
-        4: "Feeling tired or having little energy?",
-        5: "Poor appetite or overeating?",
-        6: "Feeling bad about yourself—or that you are a failure or have let yourself or your family down?",
-        7: "Trouble concentrating on things, such as reading the newspaper or watching television?",
-        8: "Moving or speaking so slowly that other people could have noticed? Or the opposite—being so fidgety or restless that you have been moving around a lot more than usual?",
-        9: "Thoughts that you would be better off dead or of hurting yourself in some way?",
+    PHQ9_QUESTIONS = (  # Question n is PHQ9_QUESTIONS[n - 1]
+        "Little interest or pleasure in doing things?",
+        "Feeling down, depressed, or hopeless?",
+        "Trouble falling or staying asleep, or sleeping too much?",
+        "Feeling tired or having little energy?",
+        "Poor appetite or overeating?",
+        "Feeling bad about yourself—or that you are a failure or have let yourself or your family down?",
+        "Trouble concentrating on things, such as reading the newspaper or watching television?",
+        "Moving or speaking so slowly that other people could have noticed? Or the opposite—being so fidgety or restless that you have been moving around a lot more than usual?",
+        "Thoughts that you would be better off dead or of hurting yourself in some way?",
+    )
+    # Category boundaries for the total score: below 5, 5-9, 10-14, 15-19, 20 and above
+    _THRESHOLDS = (5, 10, 15, 20)
+    _CATEGORIES = (
+        "Minimal or no depression",
+        "Mild depression",
+        "Moderate depression",
+        "Moderately severe depression",
+        "Severe depression",
+    )
+    # Free-text answers mapped to the 0-3 answer scale
+    _ANSWER_PHRASES = {
+        "not at all": 0, "none": 0,
+        "several days": 1, "some": 1, "sometimes": 1, "a little": 1,
+        "more than half": 2, "many": 2, "a lot": 2,
+        "nearly every day": 3, "almost every day": 3, "every day": 3, "all the time": 3,
     }
+    # Whole-word matches only, so "10" is not read as 1 and "something" not as "some"
+    _DIGIT_PATTERN = re.compile(r"\b([0-3])\b")
+    _PHRASE_PATTERN = re.compile(r"\b(?:" + "|".join(map(re.escape, _ANSWER_PHRASES)) + r")\b", re.IGNORECASE)
     
     def __init__(self):
         self.administer_question = FunctionTool(self._administer_question)
     
-    async def _administer_question(self, question_number: int) -> Dict[str, Any]:
+    def _administer_question(self, question_number: int) -> Dict[str, Any]:
         """
         Returns the question text for the given question number.
         """
-        if question_number in self.PHQ9_QUESTIONS:
+        # The number comes from the model and may arrive as 2.0 or "2"; anything
+        # that is not a whole number maps to 0, which gets the invalid-number payload
+        try:
+            number = float(question_number)
+        except (TypeError, ValueError):
+            number = 0.0
+        return self._question_payload(int(number) if number.is_integer() else 0)
+
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def _question_payload(question_number: int) -> Dict[str, Any]:
+        # Built once per question number and shared afterwards; ADK validates tool
+        # results into its own FunctionResponse, so the cached dict is never mutated.
+        if 1 <= question_number <= len(PHQ9AssessmentTool.PHQ9_QUESTIONS):
             return {
-                "question_text": self.PHQ9_QUESTIONS[question_number],
+                "question_text": PHQ9AssessmentTool.PHQ9_QUESTIONS[question_number - 1],
             }
         else:
             return {
@@ -42,13 +77,21 @@ class PHQ9AssessmentTool:
             }
     
     def classify_score(self, score: int) -> str:
-        if score >= 20:
-            return "Severe depression"
-        elif score >= 15:
-            return "Moderately severe depression"
-        elif score >= 10:
-            return "Moderate depression"
-        elif score >= 5:
-            return "Mild depression"
-        else:
-            return "Minimal or no depression"
\ No newline at end of file
+        return self._CATEGORIES[bisect_right(self._THRESHOLDS, score)]
+
+    def extract_score(self, response: str) -> Optional[int]:
+        """
+        Returns the 0-3 score in a user's answer, or None if there is none.
+        A standalone digit wins over a descriptive phrase.
+        """
+        # Fast path: a bare digit 0-3 (ord 48-51), the usual assessment answer
+        stripped = response.strip()
+        if len(stripped) == 1 and 48 <= (code := ord(stripped)) <= 51:
+            return code - 48
+        match = self._DIGIT_PATTERN.search(response)
+        if match:
+            return int(match.group(1))
+        match = self._PHRASE_PATTERN.search(response)
+        if match:
+            return self._ANSWER_PHRASES[match.group(0).lower()]
+        return None